@@ -95,6 +95,16 @@ To wait for a button press by polling in a loop:
 
 (this assumes that pressing the button changes the input from LOW to HIGH)
 
+Rather than sleeping between reads, you can let the kernel wake your program
+when the input changes, which reacts sooner and uses no CPU while waiting:
+
+.. code:: python
+
+   GPIO.poll_input(channel, level=GPIO.HIGH)
+
+This returns straight away if the input is already HIGH. See
+:py:func:`poll_input` for details, including how to give up after a timeout.
+
 Interrupts and Edge detection
 ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
 An edge is the change in state of an electrical signal from LOW to HIGH (rising
@@ -144,12 +154,17 @@ Note that in this case, the callback functions are run sequentially, not
 concurrently. This is because there is only one thread used for callbacks, in
 which every callback is run, in the order in which they have been defined.
 
+By default that thread is also the one watching the channel for edges, so a
+slow callback delays the detection of the next edge. To hand callbacks over to
+a separate thread instead, give them a queue with
+:py:func:`set_event_queue_size`:
+
+.. code:: python
+
+    GPIO.set_event_queue_size(32)  # up to 32 pending callbacks
+
 Switch debounce
 ^^^^^^^^^^^^^^^
-.. note:: Support for switch debounce is not yet complete: if specified, a
-   warning will be displayed instead, so that it is at least compatible with
-   existing code, but without implemening the actual functionality.
-
 You may notice that the callbacks are called more than once for each button
 press. This is as a result of what is known as 'switch bounce'. There are two
 ways of dealing with switch bounce:
@@ -234,6 +249,12 @@ the :py:meth:`input()` function. For example to toggle an output:
 
        GPIO.output(12, not GPIO.input(12))
 
+    or, without reading the pin back first:
+
+    .. code:: python
+
+       GPIO.toggle(12)
+
 
 PWM
 ----
@@ -392,31 +413,71 @@ Methods
 -------
 """
 
+import functools
 import warnings
 
 from OPi.constants import IN, OUT
-from OPi.constants import LOW, HIGH                     # noqa: F401
+from OPi.constants import LOW, HIGH
 from OPi.constants import NONE, RISING, FALLING, BOTH   # noqa: F401
 from OPi.constants import BCM, BOARD, SUNXI, CUSTOM
 from OPi.constants import PUD_UP, PUD_DOWN, PUD_OFF     # noqa: F401
 from OPi.constants import RED, GREEN                    # LEDs
-from OPi.pin_mappings import get_gpio_pin, set_custom_pin_mappings
+from OPi.pin_mappings import get_pin_map, set_custom_pin_mappings
 from OPi import event, sysfs
 
+_PUD_WARNING = "Pull up/down setting are not (yet) fully supported, continuing anyway. Use GPIO.setwarnings(False) to disable warnings."
+_IN_USE_WARNING = "Channel {0} is already in use, continuing anyway. Use GPIO.setwarnings(False) to disable warnings."
+
 _gpio_warnings = True
+_safe_mode = True
 _mode = None
+
+# Channels that have been set up. The dict is never mutated in place: writers
+# rebind it to an updated copy, so readers (including callback threads) always
+# see a complete snapshot without taking a lock.
 _exports = {}
 
 
+class _Channel(object):
+    __slots__ = ("direction", "pin", "fd", "state")
+
+    def __init__(self, direction, pin, fd, state=LOW):
+        self.direction = direction
+        self.pin = pin
+        self.fd = fd
+        self.state = state  # last value written, for toggle()
+
+
 def _check_configured(channel, direction=None):
     configured = _exports.get(channel)
     if configured is None:
         raise RuntimeError("Channel {0} is not configured".format(channel))
 
-    if direction is not None and direction != configured:
-        descr = "input" if configured == IN else "output"
+    if direction is not None and direction != configured.direction:
+        descr = "input" if configured.direction == IN else "output"
         raise RuntimeError("Channel {0} is configured for {1}".format(channel, descr))
 
+    return configured
+
+
+def _check_bouncetime(bouncetime):
+    if bouncetime is not None and bouncetime <= 0:
+        raise ValueError("Bouncetime must be greater than 0")
+
+
+def _iterate(channel):
+    if isinstance(channel, (list, tuple)):
+        return channel
+    return (channel,)
+
+
+def _expand_states(channels, state):
+    if isinstance(state, (list, tuple)):
+        if len(state) != len(channels):
+            raise RuntimeError("Number of channels != number of states")
+        return state
+    return [state] * len(channels)
+
 
 def getmode():
     """
@@ -436,7 +497,7 @@ def setmode(mode):
         :py:attr:`GPIO.SUNXI`, or a `dict` or `object` representing a custom
         pin mapping.
     """
-    if hasattr(mode, '__getitem__'):
+    if type(mode) is not int and hasattr(mode, '__getitem__'):
         set_custom_pin_mappings(mode)
         mode = CUSTOM
 
@@ -450,6 +511,23 @@ def setwarnings(enabled):
     _gpio_warnings = enabled
 
 
+def set_safe_mode(enabled):
+    """
+    Enable or disable the checks made on every :py:func:`input` and
+    :py:func:`output` call that the channel has been set up, and set up in the
+    right direction.
+
+    :param enabled: :py:attr:`True` (the default) to check each call, or
+        :py:attr:`False` to skip the checks once your program is known to work.
+
+    With the checks disabled, using a channel that has not been set up raises a
+    :py:exc:`KeyError` rather than a :py:exc:`RuntimeError`, and writing to an
+    input is rejected by the kernel instead. :py:func:`cleanup` re-enables them.
+    """
+    global _safe_mode
+    _safe_mode = enabled
+
+
 def setup(channel, direction, initial=None, pull_up_down=None):
     """
     You need to set up every channel you are using as an input or an output.
@@ -494,35 +572,53 @@ def setup(channel, direction, initial=None, pull_up_down=None):
                               #   chan_list = (11,12)
        GPIO.setup(chan_list, GPIO.OUT)
     """
+    global _exports
     if _mode is None:
         raise RuntimeError("Mode has not been set")
 
     if pull_up_down is not None:
         if _gpio_warnings:
-            warnings.warn("Pull up/down setting are not (yet) fully supported, continuing anyway. Use GPIO.setwarnings(False) to disable warnings.", stacklevel=2)
-
-    if isinstance(channel, list):
-        for ch in channel:
-            setup(ch, direction, initial)
-    else:
-        if channel in _exports:
-            raise RuntimeError("Channel {0} is already configured".format(channel))
-        pin = get_gpio_pin(_mode, channel)
-        try:
-            sysfs.export(pin)
-        except (OSError, IOError) as e:
-            if e.errno == 16:   # Device or resource busy
+            warnings.warn(_PUD_WARNING, stacklevel=2)
+
+    channels = _iterate(channel)
+    pin_map = get_pin_map(_mode)
+    pins = []
+    seen = set()
+    for ch in channels:
+        if ch in _exports or ch in seen:
+            raise RuntimeError("Channel {0} is already configured".format(ch))
+        seen.add(ch)
+        pins.append(pin_map[ch])
+
+    busy = sysfs.export_many(pins)
+    exports = dict(_exports)
+    try:
+        for ch, pin in zip(channels, pins):
+            if pin in busy:
                 if _gpio_warnings:
-                    warnings.warn("Channel {0} is already in use, continuing anyway. Use GPIO.setwarnings(False) to disable warnings.".format(channel), stacklevel=2)
+                    warnings.warn(_IN_USE_WARNING.format(ch), stacklevel=2)
                 sysfs.unexport(pin)
                 sysfs.export(pin)
-            else:
-                raise e
 
-        sysfs.direction(pin, direction)
-        _exports[channel] = direction
-        if direction == OUT and initial is not None:
-            sysfs.output(pin, initial)
+            sysfs.direction(pin, direction)
+            fd = sysfs.open_value(pin)
+
+            configured = _Channel(direction, pin, fd)
+            exports[ch] = configured
+            if direction == OUT and initial is not None:
+                sysfs.write_value(fd, initial)
+                configured.state = initial
+    except BaseException:
+        # Channels that did not make it into exports would never be released
+        # by cleanup(), so unexport their pins now; busy pins belong to
+        # someone else
+        sysfs.unexport_many([pin for ch, pin in zip(channels, pins)
+                             if ch not in exports and pin not in busy])
+        raise
+    finally:
+        # Publish once, including any channels set up before a failure so
+        # that cleanup() can still release them
+        _exports = exports
 
 
 def input(channel):
@@ -534,9 +630,50 @@ def input(channel):
     :returns: This will return either :py:attr:`0` / :py:attr:`GPIO.LOW` /
         :py:attr:`False` or :py:attr:`1` / :py:attr:`GPIO.HIGH` / :py:attr:`True`).
     """
-    _check_configured(channel)  # Can read from a pin configured for output
-    pin = get_gpio_pin(_mode, channel)
-    return sysfs.input(pin)
+    if _safe_mode:
+        configured = _check_configured(channel)  # Can read from a pin configured for output
+    else:
+        configured = _exports[channel]
+    return sysfs.read_value(configured.fd)
+
+
+def poll_input(channel, timeout=-1, level=None):
+    """
+    Block until the value of a GPIO pin changes, then read it.
+
+    :param channel: the channel based on the numbering system you have specified
+        (:py:attr:`GPIO.BOARD`, :py:attr:`GPIO.BCM` or :py:attr:`GPIO.SUNXI`).
+    :param timeout: (optional) the maximum time to wait in milliseconds, or
+        :py:attr:`-1` (the default) to wait indefinitely.
+    :param level: (optional) wait until the pin reads :py:attr:`GPIO.LOW` or
+        :py:attr:`GPIO.HIGH` rather than for the next change. Returns at once
+        if the pin is already at that level.
+    :returns: the new value, :py:attr:`GPIO.LOW` or :py:attr:`GPIO.HIGH`, or
+        :py:attr:`None` if the timeout expired first.
+
+    The calling thread sleeps in the kernel until an edge occurs, so this
+    reacts faster than reading the pin in a loop with a ``time.sleep()`` and
+    costs no CPU while waiting:
+
+    .. code:: python
+
+       # wait for up to 5 seconds for the input to change
+       value = GPIO.poll_input(channel, timeout=5000)
+       if value is None:
+           print('Timeout occurred')
+       else:
+           print('Input is now', value)
+
+    Calling this in a loop to wait for a particular level can miss an edge
+    that happens between calls; pass ``level`` instead:
+
+    .. code:: python
+
+       # wait for a button wired to pull the input HIGH
+       GPIO.poll_input(channel, level=GPIO.HIGH)
+    """
+    configured = _check_configured(channel, direction=IN)
+    return event.blocking_poll_value(configured.pin, configured.fd, timeout, level)
 
 
 def output(channel, state):
@@ -557,13 +694,100 @@ def output(channel, state):
        GPIO.output(chan_list, GPIO.LOW)                # sets all to GPIO.LOW
        GPIO.output(chan_list, (GPIO.HIGH, GPIO.LOW))   # sets first HIGH and second LOW
     """
-    if isinstance(channel, list):
-        for ch in channel:
-            output(ch, state)
+    if isinstance(channel, (list, tuple)):
+        states = _expand_states(channel, state)
+        if _safe_mode:
+            configured = [_check_configured(ch, direction=OUT) for ch in channel]
+        else:
+            configured = [_exports[ch] for ch in channel]
+        sysfs.write_values([c.fd for c in configured], states)
+        for c, st in zip(configured, states):
+            c.state = st
     else:
-        _check_configured(channel, direction=OUT)
-        pin = get_gpio_pin(_mode, channel)
-        return sysfs.output(pin, state)
+        if _safe_mode:
+            configured = _check_configured(channel, direction=OUT)
+        else:
+            configured = _exports[channel]
+        sysfs.write_value(configured.fd, state)
+        configured.state = state
+
+
+def toggle(channel):
+    """
+    Invert the output state of a GPIO pin.
+
+    :param channel: the channel based on the numbering system you have specified
+        (:py:attr:`GPIO.BOARD`, :py:attr:`GPIO.BCM` or :py:attr:`GPIO.SUNXI`).
+    :returns: the new state, :py:attr:`GPIO.LOW` or :py:attr:`GPIO.HIGH`.
+
+    The new state is derived from the last value this program wrote to the
+    channel, so unlike ``GPIO.output(channel, not GPIO.input(channel))`` the pin
+    is not read back first:
+
+    .. code:: python
+
+       GPIO.setup(12, GPIO.OUT)
+       while True:
+           GPIO.toggle(12)
+           time.sleep(0.5)
+    """
+    if _safe_mode:
+        configured = _check_configured(channel, direction=OUT)
+    else:
+        configured = _exports[channel]
+    state = LOW if configured.state else HIGH
+    sysfs.write_value(configured.fd, state)
+    configured.state = state
+    return state
+
+
+def reader(channel):
+    """
+    Get a function that reads the value of a GPIO pin.
+
+    :param channel: the channel based on the numbering system you have specified
+        (:py:attr:`GPIO.BOARD`, :py:attr:`GPIO.BCM` or :py:attr:`GPIO.SUNXI`).
+    :returns: a function taking no arguments that returns :py:attr:`GPIO.LOW` or
+        :py:attr:`GPIO.HIGH`, like :py:func:`input`.
+
+    The channel is looked up and checked once, when the function is created,
+    which makes it the cheapest way to read the same pin repeatedly:
+
+    .. code:: python
+
+       read_button = GPIO.reader(channel)
+       while read_button() == GPIO.LOW:
+           pass
+
+    Once the channel has been cleaned up the function raises :py:exc:`OSError`.
+    """
+    configured = _check_configured(channel)  # Can read from a pin configured for output
+    return sysfs.value_reader(configured)
+
+
+def writer(channel):
+    """
+    Get a function that sets the output state of a GPIO pin.
+
+    :param channel: the channel based on the numbering system you have specified
+        (:py:attr:`GPIO.BOARD`, :py:attr:`GPIO.BCM` or :py:attr:`GPIO.SUNXI`).
+    :returns: a function taking the state, like the second argument of
+        :py:func:`output`.
+
+    The channel is looked up and checked once, when the function is created,
+    which makes it the cheapest way to drive the same pin repeatedly:
+
+    .. code:: python
+
+       set_led = GPIO.writer(channel)
+       set_led(GPIO.HIGH)
+
+    Values written this way are not seen by :py:func:`toggle`. Once the channel
+    has been cleaned up the function raises :py:exc:`OSError`.
+    """
+    configured = _check_configured(channel, direction=OUT)
+    return sysfs.value_writer(configured)
+
 
 def setled(led, state):
     """
@@ -582,12 +806,12 @@ def setled(led, state):
        GPIO.led(leds_list, GPIO.HIGH)                  # sets both LEDs ON
        GPIO.led(leds_list, (GPIO.HIGH, GPIO.LOW))      # sets first LED ON and second LED OFF
     """
-    if isinstance(led, list):
-        for l in led:
-            setled(l, state)
+    if isinstance(led, (list, tuple)):
+        sysfs.setled_many(led, _expand_states(led, state))
     else:
         return sysfs.setled(led, state)
 
+
 def wait_for_edge(channel, trigger, timeout=-1):
     """
     This function is designed to block execution of your program until an edge
@@ -623,8 +847,7 @@ def wait_for_edge(channel, trigger, timeout=-1):
        else:
            print('Edge detected on channel', channel)
     """
-    _check_configured(channel, direction=IN)
-    pin = get_gpio_pin(_mode, channel)
+    pin = _check_configured(channel, direction=IN).pin
     if event.blocking_wait_for_edge(pin, trigger, timeout) is not None:
         return channel
 
@@ -642,7 +865,8 @@ def add_event_detect(channel, trigger, callback=None, bouncetime=None):
     :param trigger: The event to detect, one of: :py:attr:`GPIO.RISING`,
         :py:attr:`GPIO.FALLING` or :py:attr:`GPIO.BOTH`.
     :param callback: (optional) TODO
-    :param bouncetime: (optional) TODO
+    :param bouncetime: (optional) ignore any further edges for this many
+        milliseconds after an edge has been detected.
 
     .. code: python
 
@@ -651,14 +875,9 @@ def add_event_detect(channel, trigger, callback=None, bouncetime=None):
        if GPIO.event_detected(channel):
            print('Button pressed')
     """
-    _check_configured(channel, direction=IN)
-
-    if bouncetime is not None:
-        if _gpio_warnings:
-            warnings.warn("bouncetime is not (yet) fully supported, continuing anyway. Use GPIO.setwarnings(False) to disable warnings.", stacklevel=2)
-
-    pin = get_gpio_pin(_mode, channel)
-    event.add_edge_detect(pin, trigger, __wrap(callback, channel))
+    pin = _check_configured(channel, direction=IN).pin
+    _check_bouncetime(bouncetime)
+    event.add_edge_detect(pin, trigger, __wrap(callback, channel), bouncetime)
 
 
 def remove_event_detect(channel):
@@ -666,8 +885,7 @@ def remove_event_detect(channel):
     :param channel: the channel based on the numbering system you have specified
         (:py:attr:`GPIO.BOARD`, :py:attr:`GPIO.BCM` or :py:attr:`GPIO.SUNXI`).
     """
-    _check_configured(channel, direction=IN)
-    pin = get_gpio_pin(_mode, channel)
+    pin = _check_configured(channel, direction=IN).pin
     event.remove_edge_detect(pin)
 
 
@@ -676,16 +894,12 @@ def add_event_callback(channel, callback, bouncetime=None):
     :param channel: the channel based on the numbering system you have specified
         (:py:attr:`GPIO.BOARD`, :py:attr:`GPIO.BCM` or :py:attr:`GPIO.SUNXI`).
     :param callback: TODO
-    :param bouncetime: (optional) TODO
+    :param bouncetime: (optional) ignore any further edges on the channel for
+        this many milliseconds after an edge has been detected.
     """
-    _check_configured(channel, direction=IN)
-
-    if bouncetime is not None:
-        if _gpio_warnings:
-            warnings.warn("bouncetime is not (yet) fully supported, continuing anyway. Use GPIO.setwarnings(False) to disable warnings.", stacklevel=2)
-
-    pin = get_gpio_pin(_mode, channel)
-    event.add_edge_callback(pin, __wrap(callback, channel))
+    pin = _check_configured(channel, direction=IN).pin
+    _check_bouncetime(bouncetime)
+    event.add_edge_callback(pin, __wrap(callback, channel), bouncetime)
 
 
 def event_detected(channel):
@@ -710,14 +924,34 @@ def event_detected(channel):
         (:py:attr:`GPIO.BOARD`, :py:attr:`GPIO.BCM` or :py:attr:`GPIO.SUNXI`).
     :returns: :py:attr:`True` if an edge event was detected, else :py:attr:`False`.
     """
-    _check_configured(channel, direction=IN)
-    pin = get_gpio_pin(_mode, channel)
+    pin = _check_configured(channel, direction=IN).pin
     return event.edge_detected(pin)
 
 
+def set_event_queue_size(size):
+    """
+    Run event callbacks from a queue on a dedicated thread, rather than on the
+    thread that detects the edges.
+
+    :param size: the maximum number of callbacks waiting to run. When the queue
+        is full the oldest pending callback is discarded. :py:attr:`0` (the
+        default) runs callbacks directly on the edge detection threads.
+
+    Callbacks for all channels then run one at a time, in the order their edges
+    were detected, and a slow callback no longer delays edge detection.
+    Changing the size discards any callbacks that are still pending, as does
+    :py:func:`cleanup`, which also returns to the default of :py:attr:`0`.
+
+    If a callback raises an exception the remaining callbacks still run, and
+    the first exception is raised again by the next call to this function or
+    to :py:func:`cleanup`.
+    """
+    event.set_queue_size(size)
+
+
 def __wrap(callback, channel):
     if callback is not None:
-        return lambda _: callback(channel)
+        return functools.partial(callback, channel)
 
 
 def cleanup(channel=None):
@@ -745,20 +979,50 @@ def cleanup(channel=None):
        GPIO.cleanup( (channel1, channel2) )
        GPIO.cleanup( [channel1, channel2] )
     """
+    global _exports, _mode
     if channel is None:
-        cleanup(list(_exports.keys()))
-        setwarnings(True)
-        global _mode
-        _mode = None
-    elif isinstance(channel, list):
-        for ch in channel:
-            cleanup(ch)
+        configured = list(_exports.values())
+        exports = {}
     else:
-        _check_configured(channel)
-        pin = get_gpio_pin(_mode, channel)
-        event.cleanup(pin)
-        sysfs.unexport(pin)
-        del _exports[channel]
+        exports = dict(_exports)
+        configured = []
+        for ch in _iterate(channel):
+            if ch not in exports:
+                raise RuntimeError("Channel {0} is not configured".format(ch))
+            configured.append(exports.pop(ch))
+
+    # Publish first, so that no other thread picks up a descriptor that is
+    # about to be closed
+    _exports = exports
+
+    # An error from a callback surfaces when its thread is stopped. Keep going
+    # so every channel is still released, then raise the first one at the end
+    errors = []
+    for c in configured:
+        try:
+            event.cleanup(c.pin)
+        except BaseException as e:
+            errors.append(e)
+
+    if channel is None:
+        try:
+            event.set_queue_size(0)  # discard callbacks still queued
+        except BaseException as e:
+            errors.append(e)
+
+    try:
+        for c in configured:
+            sysfs.close_value(c.fd)
+            c.fd = -1  # stale readers and writers fail rather than reuse the number
+        sysfs.unexport_many([c.pin for c in configured])
+    finally:
+        if channel is None:
+            setwarnings(True)
+            set_safe_mode(True)
+            _mode = None
+
+    if errors:
+        raise errors[0]
 
 
 class PWM:
@@ -786,16 +1050,10 @@ class PWM:
         self.frequency = frequency
         self.duty_cycle_percent = duty_cycle_percent
         self.invert_polarity = invert_polarity
+        self._period_ns = int(1000000000 // frequency)
 
         try:
             sysfs.PWM_Export(chip, pin)  # creates the pwm sysfs object
-            if invert_polarity is True:
-                sysfs.PWM_Polarity(chip, pin, invert=True)  # invert pwm i.e the duty cycle tells you how long the cycle is off
-            else:
-                sysfs.PWM_Polarity(chip, pin, invert=False)  # don't invert the pwm signal. This is the normal way its used.
-            sysfs.PWM_Enable(chip, pin)
-            return sysfs.PWM_Frequency(chip, pin, frequency)
-
         except (OSError, IOError) as e:
             if e.errno == 16:   # Device or resource busy
                 warnings.warn("Pin {0} is already in use, continuing anyway.".format(pin), stacklevel=2)
@@ -804,26 +1062,30 @@ class PWM:
             else:
                 raise e
 
+        self._configure()
+
+    def _configure(self):
+        # invert pwm i.e the duty cycle tells you how long the cycle is off, otherwise
+        # don't invert the pwm signal. This is the normal way its used.
+        sysfs.PWM_Polarity(self.chip, self.pin, invert=self.invert_polarity is True)
+        sysfs.PWM_Enable(self.chip, self.pin)
+        sysfs.PWM_Frequency(self.chip, self.pin, self.frequency)
+
     def start_pwm(self):  # turn on pwm by setting the duty cycle to what the user specified
         """
         Start PWM Signal.
         """
-        return sysfs.PWM_Duty_Cycle_Percent(self.chip, self.pin, self.duty_cycle_percent)  # duty cycle controls the on-off
+        return self._set_duty_cycle(self.duty_cycle_percent)  # duty cycle controls the on-off
 
     def stop_pwm(self):  # turn on pwm by setting the duty cycle to 0
         """
         Stop PWM Signal.
         """
-        return sysfs.PWM_Duty_Cycle_Percent(self.chip, self.pin, 0)  # duty cycle at 0 is the equivilant of off
+        return self._set_duty_cycle(0)  # duty cycle at 0 is the equivilant of off
 
     def change_frequency(self, new_frequency):
-        # Order of opperations:
-        # 1. convert to period
-        # 2. check if period is increasing or decreasing
-        # 3. If increasing update pwm period and then update the duty cycle period
-        # 4. If decreasing update the duty cycle period and then the pwm period
-        # Why:
-        # The sysfs rule for PWM is that PWM Period >= duty cycle period (in nanosecs)
+        # The sysfs rule for PWM is that PWM Period >= duty cycle period (in nanosecs),
+        # sysfs.PWM_Config writes the two in whichever order keeps that true.
 
         """
         Change the frequency of the signal.
@@ -831,22 +1093,13 @@ class PWM:
         :param new_frequency: the new PWM frequency.
         """
 
-        pwm_period = (1 / new_frequency) * 1e9
-        pwm_period = int(round(pwm_period, 0))
-        duty_cycle = (self.duty_cycle_percent / 100) * pwm_period
-        duty_cycle = int(round(duty_cycle, 0))
-
-        old_pwm_period = int(round((1 / self.frequency) * 1e9, 0))
+        pwm_period = int(1000000000 // new_frequency)
+        duty_cycle = int(pwm_period * self.duty_cycle_percent // 100)
 
-        if (pwm_period > old_pwm_period):  # if increasing
-            sysfs.PWM_Period(self.chip, self.pin, pwm_period)  # update the pwm period
-            sysfs.PWM_Duty_Cycle(self.chip, self.pin, duty_cycle)  # update duty cycle
-
-        else:
-            sysfs.PWM_Duty_Cycle(self.chip, self.pin, duty_cycle)  # update duty cycle
-            sysfs.PWM_Period(self.chip, self.pin, pwm_period)  # update pwm freq
+        sysfs.PWM_Config(self.chip, self.pin, pwm_period, duty_cycle, self._period_ns)
 
         self.frequency = new_frequency  # update the frequency
+        self._period_ns = pwm_period
 
     def duty_cycle(self, duty_cycle_percent):  # in percentage (0-100)
         """
@@ -857,10 +1110,14 @@ class PWM:
 
         if (0 <= duty_cycle_percent <= 100):
             self.duty_cycle_percent = duty_cycle_percent
-            return sysfs.PWM_Duty_Cycle_Percent(self.chip, self.pin, self.duty_cycle_percent)
+            return self._set_duty_cycle(duty_cycle_percent)
         else:
             raise Exception("Duty cycle must br between 0 and 100. Current value: {0} is out of bounds".format(duty_cycle_percent))
 
+    def _set_duty_cycle(self, duty_cycle_percent):
+        duty_cycle = int(self._period_ns * duty_cycle_percent // 100)
+        sysfs.PWM_Duty_Cycle(self.chip, self.pin, duty_cycle, self._period_ns)
+
     def pwm_polarity(self):  # invert the polarity of the pwm
         """
         Invert the signal.
@@ -4,24 +4,28 @@
 
 import threading
 import select
+import time
 
-from select import EPOLLIN, EPOLLET, EPOLLPRI
+from collections import deque
+from select import EPOLLIN, EPOLLET, EPOLLPRI, EPOLLERR
 
 from OPi.constants import NONE, RISING, FALLING, BOTH
 from OPi import sysfs
 
 
 _threads = {}
+_dispatcher = None
 
 
 class _worker(threading.Thread):
 
-    # TODO: implement bouncetime
-    def __init__(self, pin, trigger, callback=None):
+    def __init__(self, pin, trigger, callback=None, bouncetime=None):
         super(_worker, self).__init__()
         self.daemon = True
         self._pin = pin
         self._trigger = trigger
+        self._last_edge = None
+        self.set_bouncetime(bouncetime)
         self._event_detected = False
         self._lock = threading.Lock()
         self._finished = False
@@ -32,6 +36,21 @@ class _worker(threading.Thread):
     def add_callback(self, callback):
         self._callbacks.append(callback)
 
+    def set_bouncetime(self, bouncetime):
+        # edges within this many seconds of the last accepted one are ignored
+        self._bouncetime = None if bouncetime is None else bouncetime / 1000.0
+
+    def debounced(self):
+        if self._bouncetime is None:
+            return False
+
+        now = time.monotonic()
+        if self._last_edge is not None and now - self._last_edge < self._bouncetime:
+            return True
+
+        self._last_edge = now
+        return False
+
     def event_detected(self):
         with self._lock:
             if self._event_detected:
@@ -58,7 +77,7 @@ class _worker(threading.Thread):
                         events = e.poll(0.1, maxevents=1)
                         if initial_edge:
                             initial_edge = False
-                        elif len(events) > 0:
+                        elif len(events) > 0 and not self.debounced():
                             with self._lock:
                                 self._event_detected = True
                                 self.notify_callbacks()
@@ -81,8 +100,74 @@ class _worker(threading.Thread):
             raise e
 
     def notify_callbacks(self):
-        for cb in self._callbacks:
-            cb(self._pin)
+        dispatcher = _dispatcher
+        if dispatcher is None:
+            for cb in self._callbacks:
+                cb()
+        else:
+            for cb in self._callbacks:
+                dispatcher.put(cb)
+
+
+class _dispatcher_thread(threading.Thread):
+
+    # Runs callbacks handed over by the edge detection threads, so that a slow
+    # callback does not hold up edge detection. deque.append and popleft are
+    # atomic, so the only synchronisation needed is waking this thread up.
+    def __init__(self, size):
+        super(_dispatcher_thread, self).__init__()
+        self.daemon = True
+        self._queue = deque(maxlen=size)  # when full, the oldest callback is dropped
+        self._wakeup = threading.Event()
+        self._finished = False
+
+    def put(self, callback):
+        self._queue.append(callback)
+        self._wakeup.set()
+
+    def cancel(self):
+        self._finished = True
+        self._wakeup.set()
+        self.join()
+
+    def run(self):
+        self.exc = None
+        queue = self._queue
+        while not self._finished:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while queue and not self._finished:
+                # A failing callback must not stop the others from running, so
+                # keep going and hold on to the first error for join()
+                try:
+                    queue.popleft()()
+                except BaseException as e:
+                    if self.exc is None:
+                        self.exc = e
+
+    def join(self):
+        super(_dispatcher_thread, self).join()
+        if self.exc:
+            e = self.exc
+            self.exc = None
+            raise e
+
+
+def set_queue_size(size):
+    global _dispatcher
+    dispatcher = _dispatcher
+    if dispatcher is not None and threading.current_thread() is dispatcher:
+        raise RuntimeError("Cannot change the event queue size from an event callback")
+
+    _dispatcher = None
+    try:
+        if dispatcher is not None:
+            dispatcher.cancel()
+    finally:
+        if size > 0:
+            dispatcher = _dispatcher_thread(size)
+            dispatcher.start()
+            _dispatcher = dispatcher
 
 
 def blocking_wait_for_edge(pin, trigger, timeout=-1):
@@ -122,6 +207,44 @@ def blocking_wait_for_edge(pin, trigger, timeout=-1):
         sysfs.edge(pin, NONE)
 
 
+def blocking_poll_value(pin, fd, timeout=-1, level=None):
+    if pin in _threads:
+        raise RuntimeError("Conflicting edge detection events already exist for this GPIO channel")
+
+    try:
+        sysfs.edge(pin, BOTH)
+
+        # Reading the value acknowledges any pending notification, so that
+        # only a subsequent edge wakes up the poll below. Edge detection stays
+        # armed until the pin reaches the requested level, so no edge is lost.
+        value = sysfs.read_value(fd)
+        if level is not None and value == level:
+            return value
+
+        e = select.epoll()
+        e.register(fd, EPOLLPRI | EPOLLERR)
+        try:
+            wait = timeout / 1000.0
+            deadline = time.monotonic() + wait
+            while True:
+                events = e.poll(wait, maxevents=1)
+                if len(events) == 0:
+                    return None
+
+                value = sysfs.read_value(fd)
+                if level is None or value == level:
+                    return value
+
+                if timeout >= 0:
+                    wait = max(deadline - time.monotonic(), 0)
+        finally:
+            e.unregister(fd)
+            e.close()
+
+    finally:
+        sysfs.edge(pin, NONE)
+
+
 def edge_detected(pin):
     if pin in _threads:
         return _threads[pin].event_detected()
@@ -129,13 +252,13 @@ def edge_detected(pin):
         return False
 
 
-def add_edge_detect(pin, trigger, callback=None):
+def add_edge_detect(pin, trigger, callback=None, bouncetime=None):
     assert trigger in [RISING, FALLING, BOTH]
 
     if pin in _threads:
         raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
 
-    _threads[pin] = _worker(pin, trigger, callback)
+    _threads[pin] = _worker(pin, trigger, callback, bouncetime)
     _threads[pin].start()
 
 
@@ -145,9 +268,11 @@ def remove_edge_detect(pin):
         del _threads[pin]
 
 
-def add_edge_callback(pin, callback):
+def add_edge_callback(pin, callback, bouncetime=None):
     if pin in _threads:
         _threads[pin].add_callback(callback)
+        if bouncetime is not None:
+            _threads[pin].set_bouncetime(bouncetime)
     else:
         raise RuntimeError("Add event detection before adding a callback")
 
@@ -75,9 +75,13 @@ def set_custom_pin_mappings(mappings):
     _pin_map[CUSTOM] = deepcopy(mappings)
 
 
-def get_gpio_pin(mode, channel):
+def get_pin_map(mode):
     assert mode in [BOARD, BCM, SUNXI, CUSTOM]
-    return _pin_map[mode][channel]
+    return _pin_map[mode]
+
+
+def get_gpio_pin(mode, channel):
+    return get_pin_map(mode)[channel]
 
 
 bcm = functools.partial(get_gpio_pin, BCM)
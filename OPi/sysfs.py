@@ -6,6 +6,7 @@ from contextlib import contextmanager
 from OPi.constants import HIGH, LOW, IN, OUT, \
     NONE, RISING, FALLING, BOTH, RED, GREEN
 
+import errno
 import os
 import time
 
@@ -45,6 +46,49 @@ def unexport(pin):
         fp.write(str(pin))
 
 
+def export_many(pins):
+    # The kernel parses a single pin number per write(), but they can all go
+    # through one descriptor. Pins that are already exported are returned
+    # rather than aborting the rest of the batch; any other error unexports
+    # the pins this call exported before it is raised.
+    if not pins:
+        return []
+
+    path = "/sys/class/gpio/export"
+    await_permissions(path)
+    exported = []
+    busy = []
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        for pin in pins:
+            try:
+                os.write(fd, str(pin).encode())
+            except (OSError, IOError) as e:
+                if e.errno != errno.EBUSY:
+                    unexport_many(exported)
+                    raise
+                busy.append(pin)
+            else:
+                exported.append(pin)
+    finally:
+        os.close(fd)
+    return busy
+
+
+def unexport_many(pins):
+    if not pins:
+        return
+
+    path = "/sys/class/gpio/unexport"
+    await_permissions(path)
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        for pin in pins:
+            os.write(fd, str(pin).encode())
+    finally:
+        os.close(fd)
+
+
 def direction(pin, dir):
     assert dir in [IN, OUT]
     path = "/sys/class/gpio/gpio{0}/direction".format(pin)
@@ -66,9 +110,59 @@ def input(pin):
 
 
 def output(pin, value):
-    str_value = "1" if value else "0"
-    with value_descriptor(pin, "w") as fp:
-        fp.write(str_value)
+    with value_descriptor(pin, "wb") as fp:
+        fp.write(b"1" if value else b"0")
+
+
+def open_value(pin):
+    path = "/sys/class/gpio/gpio{0}/value".format(pin)
+    await_permissions(path)
+    return os.open(path, os.O_RDWR)
+
+
+def close_value(fd):
+    os.close(fd)
+
+
+def read_value(fd):
+    if os.pread(fd, 1, 0) == b"0":
+        return LOW
+    else:
+        return HIGH
+
+
+def write_value(fd, value):
+    os.pwrite(fd, b"1" if value else b"0", 0)
+
+
+# The accessors below take the record holding the descriptor (anything with an
+# fd attribute) rather than the number itself, and look it up on every call:
+# once the owner closes the descriptor and sets fd to -1 they fail with EBADF,
+# instead of touching whatever file has since been given that number.
+def value_reader(channel):
+    pread = os.pread
+
+    def read():
+        return LOW if pread(channel.fd, 1, 0) == b"0" else HIGH
+
+    return read
+
+
+def value_writer(channel):
+    pwrite = os.pwrite
+
+    def write(value):
+        pwrite(channel.fd, b"1" if value else b"0", 0)
+
+    return write
+
+
+def write_values(fds, values):
+    # Every pin has its own value attribute, so there is no single descriptor a
+    # pwritev() could cover: one write per pin is the floor.
+    pwrite = os.pwrite
+    for fd, value in zip(fds, values):
+        pwrite(fd, b"1" if value else b"0", 0)
 
 
 def edge(pin, trigger):
@@ -93,9 +187,13 @@ def brightness_descriptor(pin, mode="r"):
 
 def setled(led, value):
     assert led in [RED, GREEN]
-    str_value = "1" if value else "0"
-    with brightness_descriptor(led, "w") as fp:
-        fp.write(str_value)
+    with brightness_descriptor(led, "wb") as fp:
+        fp.write(b"1" if value else b"0")
+
+
+def setled_many(leds, values):
+    for led, value in zip(leds, values):
+        setled(led, value)
 
 # Hardware PWM functionality:
 #   resources: https://developer.toradex.com/knowledge-base/pwm-linux    &    https://www.faschingbauer.me/trainings/material/soup/hardware/pwm/topic.html
@@ -156,9 +254,28 @@ def PWM_Period(chip, pin, pwm_period):  # in nanoseconds
         fp.write(str(pwm_period))
 
 
+def PWM_Config(chip, pin, pwm_period, duty_cycle, old_pwm_period):  # in nanoseconds
+    # The kernel requires duty cycle <= period after every write, so a longer
+    # period has to go in before the duty cycle and a shorter one after it.
+    # Both values are known here, so neither file needs reading back first.
+    if duty_cycle > pwm_period:
+        raise ValueError("Duty cycle {0} must be less than or equal to the PWM period {1}".format(duty_cycle, pwm_period))
+
+    period_path = "/sys/class/pwm/pwmchip{0}/pwm{1}/period".format(chip, pin)
+    duty_cycle_path = "/sys/class/pwm/pwmchip{0}/pwm{1}/duty_cycle".format(chip, pin)
+    if pwm_period > old_pwm_period:
+        writes = ((period_path, pwm_period), (duty_cycle_path, duty_cycle))
+    else:
+        writes = ((duty_cycle_path, duty_cycle), (period_path, pwm_period))
+
+    for path, value in writes:
+        await_permissions(path)
+        with open(path, "w") as fp:
+            fp.write(str(value))
+
+
 def PWM_Frequency(chip, pin, pwm_frequency):  # in Hz
-    pwm_period = (1 / pwm_frequency) * 1e9  # convert freq to time in nanoseconds
-    pwm_period = int(round(pwm_period, 0))
+    pwm_period = int(1000000000 // pwm_frequency)  # convert freq to time in nanoseconds
     path = "/sys/class/pwm/pwmchip{0}/pwm{1}/period".format(chip, pin)
     await_permissions(path)
     with open(path, "w") as fp:  # pretty sure this
@@ -177,11 +294,12 @@ def PWM_Duty_Cycle_Percent(chip, pin, Duty_cycle):  # in percentage
         fp.write(str(new_duty_cycle))
 
 
-def PWM_Duty_Cycle(chip, pin, Duty_cycle):  # in nanoseconds
-    PWM_period_path = "/sys/class/pwm/pwmchip{0}/pwm{1}/period".format(chip, pin)
-    with open(PWM_period_path, "r") as fp:  # read the current period to compare. this is necessary as the duty cycle has to be less than the period.
-        current_period = int(fp.read())
-        fp.close()
+def PWM_Duty_Cycle(chip, pin, Duty_cycle, current_period=None):  # in nanoseconds
+    if current_period is None:  # callers that already know the period can skip reading it back
+        PWM_period_path = "/sys/class/pwm/pwmchip{0}/pwm{1}/period".format(chip, pin)
+        with open(PWM_period_path, "r") as fp:  # read the current period to compare. this is necessary as the duty cycle has to be less than the period.
+            current_period = int(fp.read())
+            fp.close()
     if (Duty_cycle > current_period):
         print("Error the new duty cycle period must be less than or equal to the PWM Period: ", current_period)
         print("New Duty Cyce = ", Duty_cycle, " Current PWM Period = ", current_period)
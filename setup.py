@@ -32,6 +32,7 @@ setup(
     url="https://github.com/rm-hull/OPi.GPIO",
     download_url="https://github.com/rm-hull/OPi.GPIO/tarball/" + version,
     packages=["OPi", "nanopi", "orangepi", "rockpi"],
+    python_requires=">=3.4",
     setup_requires=pytest_runner,
     tests_require=test_deps,
     extras_require={
@@ -49,8 +50,6 @@ setup(
         "Topic :: Education",
         "Topic :: System :: Hardware",
         "Topic :: System :: Hardware :: Hardware Drivers",
-        "Programming Language :: Python :: 2",
-        "Programming Language :: Python :: 2.7",
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: 3.4",
         "Programming Language :: Python :: 3.5",
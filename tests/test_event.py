@@ -13,9 +13,11 @@ except ImportError:
     from mock import patch
 
 import time
+import threading
 import pytest
 import OPi.event as event
-from OPi.constants import RISING
+from select import EPOLLPRI, EPOLLERR
+from OPi.constants import RISING, LOW, HIGH
 
 
 def test_blocking_wait_for_edge_detected(fs):
@@ -37,6 +39,52 @@ def test_blocking_wait_for_edge_timeout(fs):
         assert event.blocking_wait_for_edge(pin, RISING, timeout=0.01) is None
 
 
+def test_blocking_poll_value_detected(fs):
+    pin = 198
+    fs.CreateFile("/sys/class/gpio/gpio{0}/edge".format(pin))
+
+    with patch("select.epoll") as mock, patch("OPi.sysfs.read_value") as read_value:
+        mock.return_value.poll.return_value = [(17, 10)]
+        read_value.side_effect = [LOW, HIGH]
+        assert event.blocking_poll_value(pin, 17, timeout=10) == HIGH
+        mock.return_value.register.assert_called_with(17, EPOLLPRI | EPOLLERR)
+        mock.return_value.poll.assert_called_with(0.01, maxevents=1)
+
+    with open("/sys/class/gpio/gpio{0}/edge".format(pin)) as fp:
+        assert fp.read() == "none"
+
+
+def test_blocking_poll_value_timeout(fs):
+    pin = 68
+    fs.CreateFile("/sys/class/gpio/gpio{0}/edge".format(pin))
+
+    with patch("select.epoll") as mock, patch("OPi.sysfs.read_value"):
+        mock.return_value.poll.return_value = []
+        assert event.blocking_poll_value(pin, 17, timeout=10) is None
+
+
+def test_blocking_poll_value_level_already_reached(fs):
+    pin = 198
+    fs.CreateFile("/sys/class/gpio/gpio{0}/edge".format(pin))
+
+    with patch("select.epoll") as mock, patch("OPi.sysfs.read_value") as read_value:
+        read_value.return_value = HIGH
+        assert event.blocking_poll_value(pin, 17, level=HIGH) == HIGH
+        mock.return_value.poll.assert_not_called()
+
+
+def test_blocking_poll_value_level_stays_armed(fs):
+    pin = 198
+    fs.CreateFile("/sys/class/gpio/gpio{0}/edge".format(pin))
+
+    with patch("select.epoll") as mock, patch("OPi.sysfs.read_value") as read_value:
+        mock.return_value.poll.return_value = [(17, 10)]
+        read_value.side_effect = [LOW, LOW, HIGH]
+        assert event.blocking_poll_value(pin, 17, level=HIGH) == HIGH
+        assert mock.return_value.poll.call_count == 2
+        mock.return_value.register.assert_called_once_with(17, EPOLLPRI | EPOLLERR)
+
+
 def test_add_edge_callback_not_setup():
     pin = 32
     with pytest.raises(RuntimeError) as ex:
@@ -113,7 +161,7 @@ def test_callback_raises_error(fs):
     fs.CreateFile("/sys/class/gpio/gpio{0}/edge".format(pin))
     fs.CreateFile("/sys/class/gpio/gpio{0}/value".format(pin))
 
-    def cb(p):
+    def cb():
         raise RuntimeError("test exception")
 
     with patch("select.epoll") as mock:
@@ -139,8 +187,8 @@ def test_add_edge_callback(fs):
 
     called = {}
 
-    def cb(p):
-        called[p] = True
+    def cb():
+        called[pin] = True
 
     with patch("select.epoll") as mock:
         try:
@@ -154,3 +202,107 @@ def test_add_edge_callback(fs):
 
         finally:
             event.cleanup()
+
+
+def test_bouncetime(fs):
+    pin = 73
+    fs.CreateFile("/sys/class/gpio/gpio{0}/edge".format(pin))
+    fs.CreateFile("/sys/class/gpio/gpio{0}/value".format(pin))
+
+    called = []
+
+    def cb():
+        called.append(pin)
+
+    with patch("select.epoll") as mock:
+        try:
+            mock.return_value.poll.return_value = [(pin, 4)]
+            event.add_edge_detect(pin, RISING, cb, bouncetime=10000)
+            time.sleep(0.5)
+            event.cleanup(pin)
+            assert called == [pin]
+
+        finally:
+            event.cleanup()
+
+
+def test_dispatcher_drops_oldest_when_full():
+    dispatcher = event._dispatcher_thread(2)
+    dispatcher.put(1)
+    dispatcher.put(2)
+    dispatcher.put(3)
+    assert list(dispatcher._queue) == [2, 3]
+
+
+def test_add_edge_callback_with_queue(fs):
+    pin = 72
+    fs.CreateFile("/sys/class/gpio/gpio{0}/edge".format(pin))
+    fs.CreateFile("/sys/class/gpio/gpio{0}/value".format(pin))
+
+    called = threading.Event()
+    threads = []
+
+    def cb():
+        threads.append(threading.current_thread())
+        called.set()
+
+    with patch("select.epoll") as mock:
+        try:
+            event.set_queue_size(4)
+            dispatcher = event._dispatcher
+            event.add_edge_detect(pin, RISING, cb)
+            mock.return_value.poll.return_value = [(pin, 4)]
+            assert called.wait(2)
+            event.cleanup(pin)
+            assert threads[0] is dispatcher
+
+        finally:
+            event.cleanup()
+            event.set_queue_size(0)
+            assert event._dispatcher is None
+
+
+def test_dispatcher_survives_callback_error():
+    called = threading.Event()
+
+    def bad():
+        raise RuntimeError("test exception")
+
+    try:
+        event.set_queue_size(4)
+        dispatcher = event._dispatcher
+        dispatcher.put(bad)
+        dispatcher.put(called.set)
+        assert called.wait(2)
+        assert dispatcher.is_alive()
+
+        with pytest.raises(RuntimeError) as ex:
+            event.set_queue_size(0)
+        assert str(ex.value) == "test exception"
+        assert not dispatcher.is_alive()
+
+    finally:
+        event.set_queue_size(0)
+        assert event._dispatcher is None
+
+
+def test_set_queue_size_from_callback():
+    called = threading.Event()
+
+    def cb():
+        try:
+            event.set_queue_size(0)
+        finally:
+            called.set()
+
+    try:
+        event.set_queue_size(4)
+        event._dispatcher.put(cb)
+        assert called.wait(2)
+
+        with pytest.raises(RuntimeError) as ex:
+            event.set_queue_size(0)
+        assert str(ex.value) == "Cannot change the event queue size from an event callback"
+
+    finally:
+        event.set_queue_size(0)
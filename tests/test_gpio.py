@@ -11,8 +11,10 @@ try:
 except ImportError:
     from mock import patch, call
 
+import warnings
 import pytest
 import OPi.GPIO as GPIO
+from OPi.pin_mappings import set_custom_pin_mappings
 
 
 def setup():
@@ -37,6 +39,41 @@ def test_warnings():
     assert GPIO._gpio_warnings
 
 
+def test_safe_mode():
+    GPIO.set_safe_mode(False)
+    assert not GPIO._safe_mode
+    GPIO.set_safe_mode(True)
+    assert GPIO._safe_mode
+
+
+def test_safe_mode_disabled():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.OUT)
+        GPIO.set_safe_mode(False)
+        with patch("OPi.GPIO._check_configured") as check:
+            GPIO.output(23, GPIO.HIGH)
+            GPIO.input(23)
+            check.assert_not_called()
+        mock.write_value.assert_called_with(mock.open_value.return_value, GPIO.HIGH)
+        mock.read_value.assert_called_with(mock.open_value.return_value)
+        with pytest.raises(KeyError):
+            GPIO.output(12, GPIO.HIGH)
+        GPIO.cleanup()
+        assert GPIO._safe_mode
+
+
+def test_setup_pull_up_down_warning():
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(GPIO.BOARD)
+        with pytest.warns(UserWarning, match="Pull up/down setting are not"):
+            GPIO.setup(23, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        GPIO.setwarnings(False)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            GPIO.setup(13, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+
+
 def test_setup_with_no_mode():
     with pytest.raises(RuntimeError) as ex:
         GPIO.setup(3, GPIO.IN)
@@ -47,16 +84,29 @@ def test_setup_single_input_channel():
     with patch("OPi.GPIO.sysfs") as mock:
         GPIO.setmode(GPIO.SUNXI)
         GPIO.setup("PA01", GPIO.IN)
-        mock.export.assert_called_with(1)
+        mock.export_many.assert_called_with([1])
         mock.direction.assert_called_with(1, GPIO.IN)
         assert "PA01" in GPIO._exports
 
 
+def test_setup_and_cleanup_replace_exports():
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(GPIO.SUNXI)
+        snapshot = GPIO._exports
+        GPIO.setup("PA01", GPIO.IN)
+        assert "PA01" not in snapshot
+        assert "PA01" in GPIO._exports
+        snapshot = GPIO._exports
+        GPIO.cleanup("PA01")
+        assert "PA01" in snapshot
+        assert "PA01" not in GPIO._exports
+
+
 def test_setup_channel_already_setup():
     with patch("OPi.GPIO.sysfs") as mock:
         GPIO.setmode(GPIO.SUNXI)
         GPIO.setup("PA01", GPIO.IN)
-        mock.export.assert_called_with(1)
+        mock.export_many.assert_called_with([1])
         mock.direction.assert_called_with(1, GPIO.IN)
         assert "PA01" in GPIO._exports
         with pytest.raises(RuntimeError) as ex:
@@ -64,51 +114,89 @@ def test_setup_channel_already_setup():
         assert str(ex.value) == "Channel PA01 is already configured"
 
 
+def test_setup_multiple_channels_publishes_once():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.SUNXI)
+        snapshots = []
+        mock.direction.side_effect = lambda pin, direction: snapshots.append(GPIO._exports)
+        GPIO.setup(["PG06", "PG07"], GPIO.OUT)
+        assert snapshots == [{}, {}]
+        assert "PG06" in GPIO._exports
+        assert "PG07" in GPIO._exports
+
+
+def test_setup_keeps_channels_configured_before_failure():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.SUNXI)
+        mock.export_many.return_value = [1]
+        mock.direction.side_effect = [None, OSError(5, "test")]
+        with pytest.raises(OSError):
+            GPIO.setup(["PG06", "PG07", "PA01", "PA02"], GPIO.OUT)
+        assert "PG06" in GPIO._exports
+        assert "PG07" not in GPIO._exports
+        assert "PA01" not in GPIO._exports
+        assert "PA02" not in GPIO._exports
+        mock.unexport_many.assert_called_once_with([199, 2])
+
+
 def test_setup_single_output_channel():
     with patch("OPi.GPIO.sysfs") as mock:
         GPIO.setmode(GPIO.SUNXI)
         GPIO.setup("PG07", GPIO.OUT)
-        mock.export.assert_called_with(199)
+        mock.export_many.assert_called_with([199])
         mock.direction.assert_called_with(199, GPIO.OUT)
-        mock.output.assert_not_called()
+        mock.write_value.assert_not_called()
         assert "PG07" in GPIO._exports
 
 
 def test_setup_channel_already_in_use_raises_OSError():
     with patch("OPi.GPIO.sysfs") as mock:
         GPIO.setmode(GPIO.SUNXI)
-        mock.export.side_effect = [OSError(16, "test"), None]
+        mock.export_many.return_value = [199]
         GPIO.setup("PG07", GPIO.OUT)
+        mock.export_many.assert_called_with([199])
         mock.export.assert_called_with(199)
         mock.unexport.assert_called_with(199)
         mock.direction.assert_called_with(199, GPIO.OUT)
-        mock.output.assert_not_called()
+        mock.write_value.assert_not_called()
         assert "PG07" in GPIO._exports
 
 
 def test_setup_channel_already_in_use_raises_IOError():
     with patch("OPi.GPIO.sysfs") as mock:
         GPIO.setmode(GPIO.SUNXI)
-        mock.export.side_effect = [IOError(16, "test"), None]
+        mock.export_many.return_value = [198]
         GPIO.setup("PG06", GPIO.OUT)
+        mock.export_many.assert_called_with([198])
         mock.export.assert_called_with(198)
         mock.unexport.assert_called_with(198)
         mock.direction.assert_called_with(198, GPIO.OUT)
-        mock.output.assert_not_called()
+        mock.write_value.assert_not_called()
         assert "PG06" in GPIO._exports
 
 
+def test_setup_multiple_channels_one_already_in_use():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.SUNXI)
+        mock.export_many.return_value = [199]
+        GPIO.setup(["PG06", "PG07"], GPIO.OUT)
+        mock.export_many.assert_called_with([198, 199])
+        mock.unexport.assert_called_once_with(199)
+        mock.export.assert_called_once_with(199)
+        mock.direction.assert_has_calls([call(198, GPIO.OUT), call(199, GPIO.OUT)])
+
+
 def test_setup_raises_OSError():
     with patch("OPi.GPIO.sysfs") as mock:
         GPIO.setmode(GPIO.SUNXI)
-        mock.export.side_effect = OSError(44, "test")
+        mock.export_many.side_effect = OSError(44, "test")
         with pytest.raises(OSError) as ex:
             GPIO.setup("PG07", GPIO.OUT)
         assert str(ex.value) == "[Errno 44] test"
-        mock.export.assert_called_with(199)
+        mock.export_many.assert_called_with([199])
         mock.unexport.assert_not_called()
         mock.direction.assert_not_called()
-        mock.output.assert_not_called()
+        mock.write_value.assert_not_called()
         assert "PG07" not in GPIO._exports
 
 
@@ -116,9 +204,10 @@ def test_setup_single_output_channel_with_initial_value():
     with patch("OPi.GPIO.sysfs") as mock:
         GPIO.setmode(GPIO.SUNXI)
         GPIO.setup("PG06", GPIO.OUT, GPIO.HIGH)
-        mock.export.assert_called_with(198)
+        mock.export_many.assert_called_with([198])
         mock.direction.assert_called_with(198, GPIO.OUT)
-        mock.output.assert_called_with(198, GPIO.HIGH)
+        mock.open_value.assert_called_with(198)
+        mock.write_value.assert_called_with(mock.open_value.return_value, GPIO.HIGH)
         assert "PG06" in GPIO._exports
 
 
@@ -130,11 +219,12 @@ def test_input_not_configured():
 
 def test_input():
     with patch("OPi.GPIO.sysfs") as mock:
-        mock.input.return_value = GPIO.HIGH
+        mock.read_value.return_value = GPIO.HIGH
         GPIO.setmode(GPIO.BOARD)
         GPIO.setup(23, GPIO.IN)
         assert GPIO.input(23) == GPIO.HIGH
-        mock.input.assert_called_with(14)
+        mock.open_value.assert_called_with(14)
+        mock.read_value.assert_called_with(mock.open_value.return_value)
 
 
 def test_input_not_configured_for_output():
@@ -157,29 +247,166 @@ def test_output():
         GPIO.setmode(GPIO.BOARD)
         GPIO.setup(23, GPIO.OUT)
         GPIO.output(23, GPIO.LOW)
-        mock.output.assert_called_with(14, GPIO.LOW)
+        mock.open_value.assert_called_with(14)
+        mock.write_value.assert_called_with(mock.open_value.return_value, GPIO.LOW)
 
 
 def test_multiple_output():
     with patch("OPi.GPIO.sysfs") as mock:
         GPIO.setmode(GPIO.BOARD)
+        mock.open_value.side_effect = [114, 100, 112]
         GPIO.setup([23, 13, 3], GPIO.OUT)
         GPIO.output([23, 13, 3], GPIO.LOW)
-        mock.output.assert_has_calls([
-            call(14, GPIO.LOW),
-            call(0, GPIO.LOW),
-            call(12, GPIO.LOW)
-        ])
+        mock.write_values.assert_called_with([114, 100, 112], [GPIO.LOW, GPIO.LOW, GPIO.LOW])
+
+
+def test_multiple_output_with_multiple_states():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        mock.open_value.side_effect = [114, 100]
+        GPIO.setup([23, 13], GPIO.OUT)
+        GPIO.output([23, 13], (GPIO.HIGH, GPIO.LOW))
+        mock.write_values.assert_called_with([114, 100], (GPIO.HIGH, GPIO.LOW))
+        with pytest.raises(RuntimeError) as ex:
+            GPIO.output([23, 13], (GPIO.HIGH,))
+        assert str(ex.value) == "Number of channels != number of states"
+
+
+def test_multiple_output_with_tuple():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        mock.open_value.side_effect = [114, 100]
+        GPIO.setup((23, 13), GPIO.OUT)
+        assert 23 in GPIO._exports
+        assert 13 in GPIO._exports
+        GPIO.output((23, 13), GPIO.HIGH)
+        mock.write_values.assert_called_with([114, 100], [GPIO.HIGH, GPIO.HIGH])
+        GPIO.cleanup((23, 13))
+        mock.close_value.assert_has_calls([call(114), call(100)])
+        mock.unexport_many.assert_called_with([14, 0])
+        assert 23 not in GPIO._exports
+        assert 13 not in GPIO._exports
+
+
+def test_multiple_output_checks_all_channels_first():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.OUT)
+        with pytest.raises(RuntimeError) as ex:
+            GPIO.output([23, 13], GPIO.HIGH)
+        assert str(ex.value) == "Channel 13 is not configured"
+        mock.write_values.assert_not_called()
+
+
+def test_multiple_setup_checks_all_channels_first():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(13, GPIO.OUT)
+        mock.reset_mock()
+        with pytest.raises(RuntimeError) as ex:
+            GPIO.setup([23, 13], GPIO.OUT)
+        assert str(ex.value) == "Channel 13 is already configured"
+        mock.export_many.assert_not_called()
+        assert 23 not in GPIO._exports
+
+
+def test_setup_duplicate_channels():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        with pytest.raises(RuntimeError) as ex:
+            GPIO.setup([23, 23], GPIO.OUT)
+        assert str(ex.value) == "Channel 23 is already configured"
+        mock.export_many.assert_not_called()
+        assert 23 not in GPIO._exports
+
+
+def test_cleanup_duplicate_channels():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.OUT)
+        with pytest.raises(RuntimeError) as ex:
+            GPIO.cleanup([23, 23])
+        assert str(ex.value) == "Channel 23 is not configured"
+        mock.unexport_many.assert_not_called()
+        assert 23 in GPIO._exports
+
+
+def test_pin_resolved_once_at_setup():
+    lookups = []
+
+    class mapper(object):
+        def __getitem__(self, value):
+            lookups.append(value)
+            return 14
+
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(mapper())
+        GPIO.setup(23, GPIO.OUT)
+        GPIO.output(23, GPIO.HIGH)
+        GPIO.input(23)
+        GPIO.cleanup(23)
+        assert lookups == [23]
+
+
+def test_toggle():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.OUT, initial=GPIO.HIGH)
+        fd = mock.open_value.return_value
+        assert GPIO.toggle(23) == GPIO.LOW
+        mock.write_value.assert_called_with(fd, GPIO.LOW)
+        assert GPIO.toggle(23) == GPIO.HIGH
+        mock.write_value.assert_called_with(fd, GPIO.HIGH)
+        GPIO.output(23, False)
+        assert GPIO.toggle(23) == GPIO.HIGH
+        mock.read_value.assert_not_called()
+
+
+def test_toggle_not_configured_for_output():
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.IN)
+        with pytest.raises(RuntimeError) as ex:
+            GPIO.toggle(23)
+        assert str(ex.value) == "Channel 23 is configured for input"
+
+
+def test_reader_and_writer():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.OUT)
+        assert GPIO.reader(23) is mock.value_reader.return_value
+        mock.value_reader.assert_called_with(GPIO._exports[23])
+        assert GPIO.writer(23) is mock.value_writer.return_value
+        mock.value_writer.assert_called_with(GPIO._exports[23])
+
+
+def test_cleanup_invalidates_descriptor():
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.OUT)
+        configured = GPIO._exports[23]
+        GPIO.cleanup(23)
+        assert configured.fd == -1
+
+
+def test_writer_not_configured_for_output():
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.IN)
+        with pytest.raises(RuntimeError) as ex:
+            GPIO.writer(23)
+        assert str(ex.value) == "Channel 23 is configured for input"
 
 
 def test_input_and_output():
     with patch("OPi.GPIO.sysfs") as mock:
-        mock.input.return_value = GPIO.HIGH
+        mock.read_value.return_value = GPIO.HIGH
         GPIO.setmode(GPIO.BOARD)
         GPIO.setup(23, GPIO.OUT)
         GPIO.output(23, not GPIO.input(23))
-        mock.input.assert_called_with(14)
-        mock.output.assert_called_with(14, GPIO.LOW)
+        mock.read_value.assert_called_with(mock.open_value.return_value)
+        mock.write_value.assert_called_with(mock.open_value.return_value, GPIO.LOW)
 
 
 def test_wait_for_edge_not_configured():
@@ -207,13 +434,53 @@ def test_wait_for_edge_completes():
             mock.blocking_wait_for_edge.assert_called_with(7, GPIO.BOTH, -1)
 
 
+def test_poll_input_not_configured_for_input():
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(12, GPIO.OUT)
+        with pytest.raises(RuntimeError) as ex:
+            GPIO.poll_input(12)
+        assert str(ex.value) == "Channel 12 is configured for output"
+
+
+def test_poll_input():
+    with patch("OPi.GPIO.sysfs") as sysfs:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(12, GPIO.IN)
+        with patch("OPi.GPIO.event") as mock:
+            mock.blocking_poll_value.return_value = GPIO.HIGH
+            assert GPIO.poll_input(12, timeout=500) == GPIO.HIGH
+            mock.blocking_poll_value.assert_called_with(7, sysfs.open_value.return_value, 500, None)
+
+
+def test_poll_input_level():
+    with patch("OPi.GPIO.sysfs") as sysfs:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(12, GPIO.IN)
+        with patch("OPi.GPIO.event") as mock:
+            GPIO.poll_input(12, level=GPIO.HIGH)
+            mock.blocking_poll_value.assert_called_with(7, sysfs.open_value.return_value, -1, GPIO.HIGH)
+
+
 def test_add_event_detect():
     with patch("OPi.GPIO.sysfs"):
         GPIO.setmode(GPIO.BOARD)
         GPIO.setup(23, GPIO.IN)
         with patch("OPi.GPIO.event") as mock:
             GPIO.add_event_detect(23, GPIO.BOTH)
-            mock.add_edge_detect.assert_called_with(14, GPIO.BOTH, None)
+            mock.add_edge_detect.assert_called_with(14, GPIO.BOTH, None, None)
+
+
+def test_add_event_detect_with_bouncetime():
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.IN)
+        with patch("OPi.GPIO.event") as mock:
+            GPIO.add_event_detect(23, GPIO.BOTH, bouncetime=200)
+            mock.add_edge_detect.assert_called_with(14, GPIO.BOTH, None, 200)
+            with pytest.raises(ValueError) as ex:
+                GPIO.add_event_callback(23, None, bouncetime=0)
+            assert str(ex.value) == "Bouncetime must be greater than 0"
 
 
 def test_add_event_detect_not_configured_for_input():
@@ -249,7 +516,7 @@ def test_add_event_callback():
         GPIO.setup(23, GPIO.IN)
         with patch("OPi.GPIO.event") as mock:
             GPIO.add_event_callback(23, None)
-            mock.add_edge_callback(14, None)
+            mock.add_edge_callback.assert_called_with(14, None, None)
 
 
 def test_add_event_callback_not_configured_for_input():
@@ -279,6 +546,12 @@ def test_event_detected_not_configured_for_input():
         assert str(ex.value) == "Channel 23 is configured for output"
 
 
+def test_set_event_queue_size():
+    with patch("OPi.GPIO.event") as mock:
+        GPIO.set_event_queue_size(16)
+        mock.set_queue_size.assert_called_with(16)
+
+
 def test_callback_wrapper_none():
     assert GPIO.__wrap(None, 12) is None
 
@@ -290,9 +563,61 @@ def test_callback_wrapper_not_none():
         called.append(pin)
 
     callback = GPIO.__wrap(cb, 17)
-    callback(97)
-    assert 17 in called
-    assert 97 not in called
+    callback()
+    assert called == [17]
+
+
+def test_cleanup_all():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        mock.open_value.side_effect = [114, 100]
+        GPIO.setup([23, 13], GPIO.OUT)
+        with patch("OPi.GPIO.event") as event:
+            GPIO.cleanup()
+            event.cleanup.assert_has_calls([call(14), call(0)])
+        mock.close_value.assert_has_calls([call(114), call(100)])
+        mock.unexport_many.assert_called_once_with([14, 0])
+        assert GPIO._exports == {}
+        assert GPIO.getmode() is None
+
+
+def test_cleanup_all_stops_event_queue():
+    with patch("OPi.GPIO.sysfs"):
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup(23, GPIO.IN)
+        with patch("OPi.GPIO.event") as event:
+            GPIO.cleanup(23)
+            event.set_queue_size.assert_not_called()
+            GPIO.cleanup()
+            event.set_queue_size.assert_called_once_with(0)
+
+
+def test_cleanup_all_continues_after_callback_error():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        mock.open_value.side_effect = [114, 100]
+        GPIO.setup([23, 13], GPIO.IN)
+        with patch("OPi.GPIO.event") as event:
+            event.cleanup.side_effect = [RuntimeError("test exception"), None]
+            with pytest.raises(RuntimeError) as ex:
+                GPIO.cleanup()
+            assert str(ex.value) == "test exception"
+            event.cleanup.assert_has_calls([call(14), call(0)])
+            event.set_queue_size.assert_called_once_with(0)
+        mock.close_value.assert_has_calls([call(114), call(100)])
+        mock.unexport_many.assert_called_once_with([14, 0])
+        assert GPIO._exports == {}
+        assert GPIO.getmode() is None
+
+
+def test_cleanup_publishes_before_closing():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.BOARD)
+        GPIO.setup([23, 13], GPIO.OUT)
+        snapshots = []
+        mock.close_value.side_effect = lambda fd: snapshots.append(dict(GPIO._exports))
+        GPIO.cleanup(23)
+        assert snapshots == [{13: GPIO._exports[13]}]
 
 
 def test_custom_dict():
@@ -302,11 +627,20 @@ def test_custom_dict():
         GPIO.setmode({"A": 5, "B": 37})
         assert GPIO.getmode() is GPIO.CUSTOM
         GPIO.setup("A", GPIO.IN)
-        mock.export.assert_called_with(5)
+        mock.export_many.assert_called_with([5])
         mock.direction.assert_called_with(5, GPIO.IN)
         assert "A" in GPIO._exports
 
 
+def test_custom_mapping_set_after_mode():
+    GPIO.cleanup()
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.setmode(GPIO.CUSTOM)
+        set_custom_pin_mappings({"A": 5})
+        GPIO.setup("A", GPIO.IN)
+        mock.export_many.assert_called_with([5])
+
+
 def test_custom_object():
     class mapper(object):
         def __getitem__(self, value):
@@ -318,6 +652,6 @@ def test_custom_object():
         GPIO.setmode(mapper())
         assert GPIO.getmode() is GPIO.CUSTOM
         GPIO.setup(11, GPIO.IN)
-        mock.export.assert_called_with(15)
+        mock.export_many.assert_called_with([15])
         mock.direction.assert_called_with(15, GPIO.IN)
         assert 11 in GPIO._exports
@@ -1,3 +1,8 @@
+try:
+    from unittest.mock import patch, call
+except ImportError:
+    from mock import patch, call
+
 import pytest
 import OPi.GPIO as GPIO
 
@@ -38,3 +43,53 @@ def test_invalid_duty_cycle():
         p.duty_cycle(-50)
         assert str(ex.value) == "Duty cycle must br between 0 and 100. Current value: {0} is out of bounds".format(Duty_Cycle_Percent_low)
         p.pwm_close()
+
+
+def test_change_frequency():
+    with patch("OPi.GPIO.sysfs") as mock:
+        p = GPIO.PWM(0, 0, 1000, 25)
+        p.change_frequency(400)
+        mock.PWM_Config.assert_called_with(0, 0, 2500000, 625000, 1000000)
+        p.change_frequency(3000)
+        mock.PWM_Config.assert_called_with(0, 0, 333333, 83333, 2500000)
+        assert p.frequency == 3000
+
+
+def test_duty_cycle():
+    with patch("OPi.GPIO.sysfs") as mock:
+        p = GPIO.PWM(0, 0, 1000, 25)
+        p.start_pwm()
+        mock.PWM_Duty_Cycle.assert_called_with(0, 0, 250000, 1000000)
+        p.duty_cycle(50)
+        mock.PWM_Duty_Cycle.assert_called_with(0, 0, 500000, 1000000)
+        p.change_frequency(400)
+        p.duty_cycle(10)
+        mock.PWM_Duty_Cycle.assert_called_with(0, 0, 250000, 2500000)
+        p.stop_pwm()
+        mock.PWM_Duty_Cycle.assert_called_with(0, 0, 0, 2500000)
+
+
+def test_pwm_setup():
+    with patch("OPi.GPIO.sysfs") as mock:
+        GPIO.PWM(0, 1, 1000, 25, invert_polarity=True)
+        assert mock.mock_calls == [
+            call.PWM_Export(0, 1),
+            call.PWM_Polarity(0, 1, invert=True),
+            call.PWM_Enable(0, 1),
+            call.PWM_Frequency(0, 1, 1000),
+        ]
+
+
+def test_pwm_setup_already_exported():
+    with patch("OPi.GPIO.sysfs") as mock:
+        mock.PWM_Export.side_effect = [OSError(16, "test"), None]
+        with pytest.warns(UserWarning):
+            GPIO.PWM(0, 1, 1000, 25)
+        assert mock.mock_calls == [
+            call.PWM_Export(0, 1),
+            call.PWM_Unexport(0, 1),
+            call.PWM_Export(0, 1),
+            call.PWM_Polarity(0, 1, invert=False),
+            call.PWM_Enable(0, 1),
+            call.PWM_Frequency(0, 1, 1000),
+        ]
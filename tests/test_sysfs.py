@@ -6,14 +6,22 @@
 """
 Tests for the :py:mod:`OPi.sysfs` module.
 """
+try:
+    from unittest.mock import Mock, patch, call, ANY
+except ImportError:
+    from mock import Mock, patch, call, ANY
+
+import errno
 import pytest
 import time
 import threading
 import os
 
-from OPi.sysfs import export, unexport, direction, input, output,\
-    edge, await_permissions, WAIT_PERMISSION_TIMEOUT
-from OPi.constants import IN, OUT, LOW, HIGH, NONE, RISING, FALLING, BOTH
+from OPi.sysfs import export, unexport, export_many, unexport_many, direction, \
+    input, output, open_value, close_value, read_value, write_value, write_values, \
+    value_reader, value_writer, \
+    setled, edge, await_permissions, WAIT_PERMISSION_TIMEOUT, PWM_Config
+from OPi.constants import IN, OUT, LOW, HIGH, NONE, RISING, FALLING, BOTH, RED
 
 
 @pytest.mark.parametrize("test_input,expected", [
@@ -44,6 +52,40 @@ def test_unexport(fs):
         assert fp.read() == "26"
 
 
+def test_export_many(fs):
+    fs.CreateFile("/sys/class/gpio/export")
+    assert export_many([19, 20]) == []
+    with open("/sys/class/gpio/export") as fp:
+        assert fp.read() == "1920"
+
+
+def test_export_many_already_exported(fs):
+    fs.CreateFile("/sys/class/gpio/export")
+    with patch("os.write") as mock:
+        mock.side_effect = [1, OSError(16, "busy"), 1]
+        assert export_many([7, 19, 20]) == [19]
+        mock.assert_has_calls([call(ANY, b"7"), call(ANY, b"19"), call(ANY, b"20")])
+
+
+def test_export_many_failure_unexports_earlier_pins(fs):
+    fs.CreateFile("/sys/class/gpio/export")
+    fs.CreateFile("/sys/class/gpio/unexport")
+    with patch("os.write") as mock:
+        mock.side_effect = [1, OSError(16, "busy"), OSError(22, "invalid"), 1]
+        with pytest.raises(OSError) as ex:
+            export_many([7, 19, 20, 21])
+        assert ex.value.errno == 22
+        mock.assert_has_calls([call(ANY, b"7"), call(ANY, b"19"), call(ANY, b"20"), call(ANY, b"7")])
+        assert mock.call_count == 4
+
+
+def test_unexport_many(fs):
+    fs.CreateFile("/sys/class/gpio/unexport")
+    unexport_many([26, 27])
+    with open("/sys/class/gpio/unexport") as fp:
+        assert fp.read() == "2627"
+
+
 @pytest.mark.parametrize("test_input,expected", [
     (IN, "in"),
     (OUT, "out"),
@@ -77,6 +119,84 @@ def test_output(fs, test_input, expected):
         assert fp.read() == expected
 
 
+def test_open_value(fs):
+    fs.CreateFile("/sys/class/gpio/gpio0/value")
+    fd = open_value(0)
+    try:
+        assert fd >= 0
+    finally:
+        close_value(fd)
+
+
+@pytest.mark.parametrize("test_input,expected", [
+    (b"0\n", LOW),
+    (b"1\n", HIGH),
+])
+def test_read_value(test_input, expected):
+    with patch("os.pread") as mock:
+        mock.return_value = test_input[:1]
+        assert read_value(7) == expected
+        mock.assert_called_with(7, 1, 0)
+
+
+@pytest.mark.parametrize("test_input,expected", [
+    (LOW, b"0"),
+    (HIGH, b"1"),
+])
+def test_write_value(test_input, expected):
+    with patch("os.pwrite") as mock:
+        write_value(7, test_input)
+        mock.assert_called_with(7, expected, 0)
+
+
+def test_value_reader():
+    with patch("os.pread") as mock:
+        mock.side_effect = [b"1", b"0"]
+        read = value_reader(Mock(fd=7))
+        assert read() == HIGH
+        assert read() == LOW
+        mock.assert_called_with(7, 1, 0)
+
+
+def test_value_writer():
+    with patch("os.pwrite") as mock:
+        write = value_writer(Mock(fd=7))
+        write(HIGH)
+        write(LOW)
+        mock.assert_has_calls([call(7, b"1", 0), call(7, b"0", 0)])
+
+
+def test_value_accessors_after_close():
+    channel = Mock(fd=7)
+    read = value_reader(channel)
+    write = value_writer(channel)
+    channel.fd = -1
+    with pytest.raises(OSError) as ex:
+        read()
+    assert ex.value.errno == errno.EBADF
+    with pytest.raises(OSError) as ex:
+        write(HIGH)
+    assert ex.value.errno == errno.EBADF
+
+
+def test_write_values():
+    with patch("os.pwrite") as mock:
+        write_values([7, 8], [HIGH, LOW])
+        mock.assert_has_calls([call(7, b"1", 0), call(8, b"0", 0)])
+
+
+@pytest.mark.parametrize("test_input,expected", [
+    (LOW, "0"),
+    (HIGH, "1"),
+])
+def test_setled(fs, test_input, expected):
+    path = "/sys/class/leds/{0}/brightness".format(RED)
+    fs.CreateFile(path)
+    setled(RED, test_input)
+    with open(path) as fp:
+        assert fp.read() == expected
+
+
 @pytest.mark.parametrize("test_input,expected", [
     (NONE, "none"),
     (RISING, "rising"),
@@ -88,3 +208,31 @@ def test_edge(fs, test_input, expected):
     edge(5, test_input)
     with open("/sys/class/gpio/gpio5/edge") as fp:
         assert fp.read() == expected
+
+
+@pytest.mark.parametrize("old_period,expected", [
+    (1000000, ["period", "duty_cycle"]),
+    (4000000, ["duty_cycle", "period"]),
+])
+def test_pwm_config(fs, old_period, expected):
+    fs.CreateFile("/sys/class/pwm/pwmchip0/pwm1/period")
+    fs.CreateFile("/sys/class/pwm/pwmchip0/pwm1/duty_cycle")
+    with patch("OPi.sysfs.open", wraps=open, create=True) as mock, \
+            patch("OPi.sysfs.await_permissions") as await_permissions:
+        PWM_Config(0, 1, 2500000, 625000, old_period)
+        assert [c[1][0].rsplit("/", 1)[1] for c in mock.mock_calls if c[0] == ""] == expected
+        assert [c[1][0].rsplit("/", 1)[1] for c in await_permissions.mock_calls] == expected
+    with open("/sys/class/pwm/pwmchip0/pwm1/period") as fp:
+        assert fp.read() == "2500000"
+    with open("/sys/class/pwm/pwmchip0/pwm1/duty_cycle") as fp:
+        assert fp.read() == "625000"
+
+
+def test_pwm_config_duty_cycle_longer_than_period(fs):
+    fs.CreateFile("/sys/class/pwm/pwmchip0/pwm1/period")
+    fs.CreateFile("/sys/class/pwm/pwmchip0/pwm1/duty_cycle")
+    with pytest.raises(ValueError) as ex:
+        PWM_Config(0, 1, 1000000, 2000000, 1000000)
+    assert str(ex.value) == "Duty cycle 2000000 must be less than or equal to the PWM period 1000000"
+    with open("/sys/class/pwm/pwmchip0/pwm1/period") as fp:
+        assert fp.read() == ""